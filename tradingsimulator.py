@@ -1,55 +1,426 @@
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+import numpy as np
 import yfinance as yf
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import io
-import base64
+import os
 import random
+import re
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
 from datetime import datetime
+from functools import partial
+from html import escape
+from threading import Lock, Thread
 
-app = Flask(__name__)
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson, used for jsonify() and
+    request.get_json() when orjson is installed.
+    """
 
-# We'll store the portfolio performance history (time, value)
-portfolio_history = []
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+app = Flask(__name__)
+if orjson:
+    app.json = OrjsonProvider(app)
+
+# gzip/br text responses (the page, JSON, SVG charts) when Flask-Compress is installed
+app.config["COMPRESS_MIN_SIZE"] = 512
+app.config["COMPRESS_MIMETYPES"] = [
+    "text/html", "text/css", "text/javascript", "application/json", "image/svg+xml",
+]
+if Compress:
+    Compress(app)
+
+# We'll store the portfolio performance history (time, value) per browser session,
+# keeping the last 720 points (one per streamed price change or trade)
+HISTORY_LENGTH = 720
+MAX_SESSIONS = 1000
+SESSION_COOKIE = "portfolio_id"
+portfolio_histories = OrderedDict()  # session id -> deque of (time, value)
+portfolio_histories_lock = Lock()
+last_portfolio_charts = {}  # session id -> (time of newest point, png)
+
+# Spot prices go stale quickly, 1-year daily history doesn't change intraday
+PRICE_CACHE_TTL = 30
+CHART_CACHE_TTL = 86400
+
+# Shape of a Yahoo ticker; other symbols are rejected without a request
+VALID_SYMBOL = re.compile(r'[A-Z0-9.=^-]{1,10}')
+
+# Redis cache in front of Yahoo Finance, enabled by setting REDIS_URL. Short socket
+# timeouts keep an unreachable server from stalling lookups before the direct fetch.
+REDIS_URL = os.environ.get("REDIS_URL")
+REDIS_TIMEOUT = 0.25
+cache = None
+if redis and REDIS_URL:
+    cache = redis.Redis.from_url(REDIS_URL, socket_connect_timeout=REDIS_TIMEOUT,
+                                 socket_timeout=REDIS_TIMEOUT)
+
+# Concurrent price lookups are coalesced and sent to Yahoo in one download
+BATCH_INTERVAL = 0.05
+BATCH_SIZE = 20
+pending_prices = {}  # symbol -> list of Futures waiting on its price
+pending_lock = Lock()
+batcher_started = False  # started on first lookup so forked workers get their own
+
+# Yahoo Finance I/O runs on a shared pool so request threads only wait, with a deadline
+FETCH_TIMEOUT = 5
+executor = ThreadPoolExecutor(max_workers=16)
+
+# yf.Ticker objects are reused so warm symbols skip Yahoo's cookie/crumb setup
+MAX_TICKERS = 500
+tickers = OrderedDict()  # symbol -> yf.Ticker
+tickers_lock = Lock()
+
+# Reusable matplotlib figures, one per chart, each guarded by its own lock
+chart_canvases = {}  # name -> (fig, ax, buffer, lock)
+chart_canvases_lock = Lock()
+
+# Price streams re-check prices this often (cached or batched) and push only changes
+STREAM_INTERVAL = 10
+MAX_SYMBOLS = 50  # per /prices or /stream request
+# Each open stream holds a server thread, so streams are capped in number and
+# end after STREAM_LIFETIME seconds; browsers reconnect after STREAM_RETRY_MS
+MAX_STREAMS = 32
+STREAM_LIFETIME = 300
+STREAM_RETRY_MS = 1000
+active_streams = 0
+active_streams_lock = Lock()
+
+# Stock charts are drawn directly as SVG on a fixed canvas
+SVG_WIDTH = 800
+SVG_HEIGHT = 400
+SVG_PADDING = 60
+CHART_POINTS = 100  # 1-year history is downsampled to this many points
 
 
 # ---------- Helper Functions ----------
 
+def cache_get(key):
+    """
+    Returns the cached value for key as a string, or None on a miss.
+    Redis errors are treated as misses so we fall back to a direct fetch.
+    """
+    if cache is None:
+        return None
+    try:
+        value = cache.get(key)
+    except Exception as e:
+        print(f"Error reading cache key {key}: {e}")
+        return None
+    return value.decode('utf-8') if value is not None else None
+
+
+def cache_set(key, value, ttl):
+    """
+    Stores value under key for ttl seconds. Redis errors are ignored.
+    """
+    if cache is None:
+        return
+    try:
+        cache.setex(key, ttl, value)
+    except Exception as e:
+        print(f"Error writing cache key {key}: {e}")
+
+
+def download_prices(symbols):
+    """
+    Fetches the latest close for several symbols in a single Yahoo Finance
+    request. Returns {symbol: price}, with None for symbols that came back
+    without a close: yf.download reports transport failures the same way as
+    unknown tickers, so the two can't be told apart.
+    """
+    df = yf.download(tickers=" ".join(symbols), period="1d", group_by='ticker',
+                     threads=False, progress=False)
+    prices = {}
+    for symbol in symbols:
+        try:
+            # Single-ticker downloads may come back without the ticker level
+            if df.columns.nlevels > 1:
+                closes = df[symbol]['Close'].dropna()
+            else:
+                closes = df['Close'].dropna()
+        except KeyError:
+            prices[symbol] = None
+            continue
+        prices[symbol] = round(float(closes.iloc[-1]), 2) if not closes.empty else None
+    return prices
+
+
+def resolve_prices(download, chunk, waiters):
+    """
+    Done-callback for a chunk download: hands each waiter its price, or None
+    if the download failed.
+    """
+    try:
+        prices = download.result()
+    except Exception as e:
+        print(f"Error fetching prices for {', '.join(chunk)}: {e}")
+        prices = None
+    for symbol in chunk:
+        for future in waiters[symbol]:
+            future.set_result(prices.get(symbol) if prices is not None else None)
+
+
+def price_batcher():
+    """
+    Background loop: every BATCH_INTERVAL seconds, drain the pending lookups
+    and start downloading them in chunks of BATCH_SIZE on the executor.
+    Waiters are resolved from each download's done-callback, so a slow chunk
+    never holds up the next batch; wait_price enforces the deadline.
+    """
+    while True:
+        time.sleep(BATCH_INTERVAL)
+        with pending_lock:
+            if not pending_prices:
+                continue
+            batch = dict(pending_prices)
+            pending_prices.clear()
+        symbols = list(batch)
+        for i in range(0, len(symbols), BATCH_SIZE):
+            chunk = symbols[i:i + BATCH_SIZE]
+            download = executor.submit(download_prices, chunk)
+            download.add_done_callback(partial(resolve_prices, chunk=chunk, waiters=batch))
+
+
+def queue_price(symbol):
+    """
+    Queues symbol for the next batched download and returns its Future.
+    """
+    global batcher_started
+    future = Future()
+    with pending_lock:
+        if not batcher_started:
+            Thread(target=price_batcher, daemon=True).start()
+            batcher_started = True
+        pending_prices.setdefault(symbol, []).append(future)
+    return future
+
+
+def wait_price(symbol, future):
+    """
+    Waits for a queued price. Returns None if the fetch failed, timed out
+    or had no data for the symbol.
+    """
+    try:
+        # Allow for the batching delay on top of the download deadline
+        return future.result(timeout=FETCH_TIMEOUT + BATCH_INTERVAL)
+    except TimeoutError:
+        print(f"Timed out fetching price for {symbol}")
+        return None
+
+
+def fetch_price(symbol):
+    """
+    Fetches one price through the batcher; see wait_price for the result.
+    """
+    return wait_price(symbol, queue_price(symbol))
+
+
+def remember_price(symbol, price):
+    """
+    Caches a fetched price and returns it as a number. Misses (None) come
+    back as 0 and are never cached, since a network blip looks the same as
+    an unknown ticker.
+    """
+    if not price:
+        return 0
+    cache_set(f"px:{symbol}", str(price), PRICE_CACHE_TTL)
+    return price
+
+
 def get_stock_price(symbol):
     """
     Returns the current price of the stock.
     If symbol == 'RANDOM', returns a random price each time.
-    Otherwise, fetch from Yahoo Finance.
+    Otherwise, fetch from Yahoo Finance (batched with other lookups).
     """
     symbol = symbol.upper()
     if symbol == "RANDOM":
         return round(100 * (1 + random.uniform(-0.1, 0.1)), 2)
-    try:
-        stock = yf.Ticker(symbol)
-        hist = stock.history(period="1d")
-        if hist.empty:
-            return 0
-        return round(hist['Close'].iloc[-1], 2)
-    except Exception as e:
-        print(f"Error fetching price for {symbol}: {e}")
+    if not VALID_SYMBOL.fullmatch(symbol):
         return 0
+    cached = cache_get(f"px:{symbol}")
+    if cached is not None:
+        return float(cached)
+    return remember_price(symbol, fetch_price(symbol))
+
+
+def get_stock_prices(symbols):
+    """
+    Returns {symbol: price} for a list of symbols. Cached and RANDOM prices
+    are resolved locally; the rest are queued on the batcher together, so
+    they share downloads with every other concurrent lookup and stream.
+    """
+    prices = {}
+    queued = {}
+    for symbol in dict.fromkeys(str(sym).upper() for sym in symbols):
+        if symbol == "RANDOM" or not VALID_SYMBOL.fullmatch(symbol):
+            prices[symbol] = get_stock_price(symbol)
+            continue
+        cached = cache_get(f"px:{symbol}")
+        if cached is not None:
+            prices[symbol] = float(cached)
+        else:
+            queued[symbol] = queue_price(symbol)
+    for symbol, future in queued.items():
+        prices[symbol] = remember_price(symbol, wait_price(symbol, future))
+    return prices
+
+
+def get_chart_canvas(name):
+    """
+    Returns the (fig, ax, buffer, lock) used to render the named chart,
+    creating it on first use. Hold the lock while drawing or saving.
+    """
+    with chart_canvases_lock:
+        if name not in chart_canvases:
+            fig = Figure(figsize=(8, 4))
+            chart_canvases[name] = (fig, fig.subplots(), io.BytesIO(), Lock())
+        return chart_canvases[name]
+
+
+def lttb_indices(values, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling: returns the indices of at
+    most n_out points that best preserve the shape of the series.
+    """
+    n = len(values)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    y = np.asarray(values, dtype=np.float64)
+    x = np.arange(n, dtype=np.float64)
+    bucket = (n - 2) / (n_out - 2)
+    indices = [0]
+    a = 0
+    for i in range(n_out - 2):
+        start, end = int(i * bucket) + 1, int((i + 1) * bucket) + 1
+        next_start = end
+        next_end = max(min(int((i + 2) * bucket) + 1, n), next_start + 1)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        indices.append(a)
+    indices.append(n - 1)
+    return np.array(indices)
+
+
+def render_svg_chart(dates, values, title, color, positions=None):
+    """
+    Draws a single-line chart as an SVG string: title, price polyline,
+    min/max price labels and first/last date labels. positions gives each
+    point's x position (e.g. its index before downsampling).
+    """
+    if positions is None:
+        positions = range(len(values))
+    lo, hi = min(values), max(values)
+    span = (hi - lo) or 1
+    plot_w = SVG_WIDTH - 2 * SVG_PADDING
+    plot_h = SVG_HEIGHT - 2 * SVG_PADDING
+    x0 = positions[0]
+    x_span = (positions[-1] - x0) or 1
+    points = " ".join(
+        f"{SVG_PADDING + (p - x0) / x_span * plot_w:.1f},{SVG_PADDING + (hi - v) / span * plot_h:.1f}"
+        for p, v in zip(positions, values)
+    )
+    top, bottom = SVG_PADDING, SVG_HEIGHT - SVG_PADDING
+    left, right = SVG_PADDING, SVG_WIDTH - SVG_PADDING
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {SVG_WIDTH} {SVG_HEIGHT}" '
+        f'font-family="sans-serif" font-size="12" fill="#333">'
+        f'<rect width="100%" height="100%" fill="#fff"/>'
+        f'<text x="{SVG_WIDTH / 2}" y="{top / 2}" text-anchor="middle" font-size="16">{escape(title)}</text>'
+        f'<g stroke="#ccc" stroke-dasharray="4 4">'
+        f'<line x1="{left}" y1="{top}" x2="{right}" y2="{top}"/>'
+        f'<line x1="{left}" y1="{bottom}" x2="{right}" y2="{bottom}"/></g>'
+        f'<polyline points="{points}" fill="none" stroke="{color}" stroke-width="2"/>'
+        f'<text x="{left - 6}" y="{top + 4}" text-anchor="end">{hi:.2f}</text>'
+        f'<text x="{left - 6}" y="{bottom + 4}" text-anchor="end">{lo:.2f}</text>'
+        f'<text x="{left}" y="{bottom + 20}">{dates[0]:%Y-%m-%d}</text>'
+        f'<text x="{right}" y="{bottom + 20}" text-anchor="end">{dates[-1]:%Y-%m-%d}</text>'
+        f'</svg>'
+    )
+
+
+def get_portfolio_history(session_id):
+    """
+    Returns the bounded history deque for a session, creating it if needed.
+    The least recently used session is dropped once MAX_SESSIONS is reached.
+    """
+    with portfolio_histories_lock:
+        history = portfolio_histories.get(session_id)
+        if history is None:
+            history = portfolio_histories[session_id] = deque(maxlen=HISTORY_LENGTH)
+            if len(portfolio_histories) > MAX_SESSIONS:
+                evicted, _ = portfolio_histories.popitem(last=False)
+                last_portfolio_charts.pop(evicted, None)
+        else:
+            portfolio_histories.move_to_end(session_id)
+        return history
+
+
+def get_ticker(symbol):
+    """
+    Returns a shared yf.Ticker for symbol, dropping the least recently used
+    one once MAX_TICKERS are held.
+    """
+    with tickers_lock:
+        ticker = tickers.get(symbol)
+        if ticker is None:
+            ticker = tickers[symbol] = yf.Ticker(symbol)
+            if len(tickers) > MAX_TICKERS:
+                tickers.popitem(last=False)
+        else:
+            tickers.move_to_end(symbol)
+        return ticker
 
 
 def get_stock_history(symbol):
     """
     For real symbols, fetch 1-year data from Yahoo Finance.
     For 'RANDOM', no chart is returned (so we return empty).
+    Returns None if the fetch failed or timed out.
     """
     if symbol.upper() == "RANDOM":
         return [], []
     try:
-        stock = yf.Ticker(symbol)
-        hist = stock.history(period="1y")['Close']
+        stock = get_ticker(symbol.upper())
+        hist = executor.submit(stock.history, period="1y").result(timeout=FETCH_TIMEOUT)['Close']
         if hist.empty:
             return [], []
         return hist.index, hist.values
     except Exception as e:
         print(f"Error fetching history for {symbol}: {e}")
-        return [], []
+        return None
 
 
 # ---------- HTML Template ----------
@@ -212,7 +583,7 @@ html_content = '''
   // Render portfolio table and cash amount
   function updatePortfolioTable() {
     const table = document.getElementById('portfolioTable');
-    table.innerHTML = '';
+    const rows = [];
     for (const symbol in portfolio.stocks) {
       const holding = portfolio.stocks[symbol];
       const currentPrice = holding.currentPrice || holding.avg_price;
@@ -226,21 +597,24 @@ html_content = '''
           <td>$${value}</td>
         </tr>
       `;
-      table.innerHTML += row;
+      rows.push(row);
     }
+    table.innerHTML = rows.join('');
     document.getElementById('cashAmount').innerText = portfolio.cash.toFixed(2);
   }
 
-  // Synchronous fetch for the current price (for immediate updates)
-  function fetchCurrentPrice(symbol) {
-    const xhr = new XMLHttpRequest();
-    xhr.open("GET", "/get_stock_price/" + symbol, false);
-    xhr.send();
-    if (xhr.status === 200) {
-      const data = JSON.parse(xhr.responseText);
+  // Fetch the current price without blocking the page
+  async function fetchCurrentPrice(symbol) {
+    try {
+      const res = await fetch("/get_stock_price/" + encodeURIComponent(symbol));
+      if (!res.ok) {
+        return 0;
+      }
+      const data = await res.json();
       return data.price || 0;
+    } catch (e) {
+      return 0;
     }
-    return 0;
   }
 
   // Get stock data (price and chart)
@@ -252,13 +626,14 @@ html_content = '''
       .then(data => {
         if (data.price) {
           document.getElementById('stockPrice').innerText = "Stock Price: $" + data.price;
-          // Fetch the 1-year chart if symbol is not RANDOM
-          fetch("/get_stock_price_chart/" + symbol)
-            .then(res => res.json())
-            .then(chartData => {
-              const chartImage = document.getElementById('stockChart');
-              chartImage.src = chartData.chart ? "data:image/png;base64," + chartData.chart : "";
-            });
+          // Load the 1-year SVG chart if symbol is not RANDOM
+          const chartImage = document.getElementById('stockChart');
+          chartImage.onerror = () => chartImage.removeAttribute('src');
+          if (symbol === "RANDOM") {
+            chartImage.removeAttribute('src');
+          } else {
+            chartImage.src = "/get_stock_price_chart/" + encodeURIComponent(symbol);
+          }
         } else {
           document.getElementById('stockPrice').innerText = "❌ Stock not found.";
         }
@@ -266,14 +641,14 @@ html_content = '''
   }
 
   // Buy stock function
-  function buyStock() {
+  async function buyStock() {
     const symbol = document.getElementById('tradeSymbol').value.toUpperCase();
     const quantity = parseInt(document.getElementById('tradeQuantity').value);
     if (!symbol || quantity <= 0) {
       alert("Invalid input.");
       return;
     }
-    const price = fetchCurrentPrice(symbol);
+    const price = await fetchCurrentPrice(symbol);
     if (!price) {
       alert("Stock not found or price unavailable.");
       return;
@@ -295,11 +670,13 @@ html_content = '''
       portfolio.stocks[symbol] = { quantity: quantity, avg_price: price, currentPrice: price };
     }
     updatePortfolioTable();
+    getPortfolioChart();
+    watchPrices();
     alert(`Bought ${quantity} shares of ${symbol} at $${price} each.`);
   }
 
   // Sell stock function
-  function sellStock() {
+  async function sellStock() {
     const symbol = document.getElementById('tradeSymbol').value.toUpperCase();
     const quantity = parseInt(document.getElementById('tradeQuantity').value);
     if (!symbol || quantity <= 0) {
@@ -310,7 +687,7 @@ html_content = '''
       alert("Not enough shares to sell.");
       return;
     }
-    const price = fetchCurrentPrice(symbol);
+    const price = await fetchCurrentPrice(symbol);
     if (!price) {
       alert("Stock not found or price unavailable.");
       return;
@@ -321,6 +698,8 @@ html_content = '''
       delete portfolio.stocks[symbol];
     }
     updatePortfolioTable();
+    getPortfolioChart();
+    watchPrices();
     alert(`Sold ${quantity} shares of ${symbol} at $${price} each.`);
   }
 
@@ -331,22 +710,52 @@ html_content = '''
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify(portfolio)
     })
-    .then(res => res.json())
-    .then(data => {
+    .then(res => res.status === 200 ? res.blob() : null)
+    .then(blob => {
       const chartElem = document.getElementById('portfolioChart');
-      chartElem.src = data.chart ? "data:image/png;base64," + data.chart : "";
+      if (chartElem.src.startsWith("blob:")) {
+        URL.revokeObjectURL(chartElem.src);
+      }
+      if (blob) {
+        chartElem.src = URL.createObjectURL(blob);
+      } else {
+        chartElem.removeAttribute('src');
+      }
     });
   }
 
-  // Periodically update RANDOM price (if applicable) and portfolio performance chart
-  setInterval(() => {
-    if (portfolio.stocks["RANDOM"]) {
-      const newPrice = fetchCurrentPrice("RANDOM");
-      portfolio.stocks["RANDOM"].currentPrice = newPrice;
-      updatePortfolioTable();
+  // Holding prices are pushed by the server whenever they change
+  let priceStream = null;
+
+  // (Re)open the price stream for the current holdings
+  function watchPrices() {
+    if (priceStream) {
+      priceStream.close();
+      priceStream = null;
     }
-    getPortfolioChart();
-  }, 10000); // every 10 seconds
+    const symbols = Object.keys(portfolio.stocks);
+    if (symbols.length === 0) {
+      return;
+    }
+    priceStream = new EventSource("/stream?symbols=" + encodeURIComponent(symbols.join(",")));
+    priceStream.onmessage = ev => {
+      const prices = JSON.parse(ev.data);
+      for (const symbol in prices) {
+        if (portfolio.stocks[symbol]) {
+          portfolio.stocks[symbol].currentPrice = prices[symbol];
+        }
+      }
+      updatePortfolioTable();
+      getPortfolioChart();
+    };
+    // A refused stream (503) isn't retried by the browser; try again later
+    const stream = priceStream;
+    stream.onerror = () => {
+      if (stream.readyState === EventSource.CLOSED && stream === priceStream) {
+        setTimeout(() => { if (stream === priceStream) watchPrices(); }, 30000);
+      }
+    };
+  }
 
   // Initial render
   updatePortfolioTable();
@@ -360,97 +769,164 @@ html_content = '''
 
 @app.route('/')
 def home():
-    return render_template_string(html_content)
+    # The page has no template variables, so it is served as-is without Jinja
+    return html_content
 
 
 @app.route('/get_stock_price/<symbol>')
 def api_get_stock_price(symbol):
-    symbol_up = symbol.upper()
-    if symbol_up == "RANDOM":
-        price = round(100 * (1 + random.uniform(-0.1, 0.1)), 2)
-        return jsonify({"price": price})
-    else:
-        try:
-            stock = yf.Ticker(symbol_up)
-            hist = stock.history(period="1d")
-            if hist.empty:
-                return jsonify({"price": 0})
-            price = round(hist['Close'].iloc[-1], 2)
-            return jsonify({"price": price})
-        except Exception as e:
-            print(f"Error fetching price for {symbol_up}: {e}")
-            return jsonify({"price": 0})
+    return jsonify({"price": get_stock_price(symbol)})
 
 
-@app.route('/get_stock_price_chart/<symbol>')
-def api_get_stock_price_chart(symbol):
-    if symbol.upper() == "RANDOM":
-        return jsonify({"chart": ""})
-    try:
-        stock = yf.Ticker(symbol)
-        hist = stock.history(period="1y")['Close']
-        if hist.empty:
-            return jsonify({"chart": ""})
-    except Exception as e:
-        print(f"Error fetching 1y history for {symbol}: {e}")
-        return jsonify({"chart": ""})
+@app.route('/prices', methods=['POST'])
+def api_get_stock_prices():
+    """
+    Bulk lookup for API clients: {"symbols": [...]} -> {symbol: price}.
+    The page itself gets prices from /stream.
+    """
+    data = request.get_json(silent=True)
+    symbols = data.get("symbols") if isinstance(data, dict) else None
+    if not isinstance(symbols, list) or not all(isinstance(sym, str) for sym in symbols):
+        return jsonify({"error": "expected {\"symbols\": [\"AAPL\", ...]}"}), 400
+    if len(symbols) > MAX_SYMBOLS:
+        return jsonify({"error": f"at most {MAX_SYMBOLS} symbols per request"}), 400
+    return jsonify(get_stock_prices(symbols))
 
-    # Plot the stock price history
-    fig, ax = plt.subplots(figsize=(8, 4))
-    ax.plot(hist.index, hist.values, color="#3d5a80", linewidth=2)
-    ax.set_title(f"{symbol.upper()} Price History (1 Year)")
-    ax.set_xlabel("Date")
-    ax.set_ylabel("Price (USD)")
-    ax.grid(True, linestyle="--", alpha=0.5)
 
-    # Format x-axis for readability
-    fig.autofmt_xdate()
+@app.route('/stream')
+def stream_prices():
+    """
+    Server-Sent Events stream of {symbol: price} for ?symbols=A,B,C.
+    Prices are checked every STREAM_INTERVAL seconds and only changed ones
+    are pushed; the first event carries every known price. Returns 503 when
+    MAX_STREAMS are already open.
+    """
+    global active_streams
+    symbols = [s for s in request.args.get("symbols", "").upper().split(",") if s]
+    symbols = symbols[:MAX_SYMBOLS]
+    with active_streams_lock:
+        if active_streams >= MAX_STREAMS:
+            return Response(status=503)
+        active_streams += 1
+
+    def release_stream():
+        global active_streams
+        with active_streams_lock:
+            active_streams -= 1
+
+    def events():
+        last_prices = {}
+        deadline = time.monotonic() + STREAM_LIFETIME
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
+        while time.monotonic() < deadline:
+            prices = get_stock_prices(symbols)
+            changed = {sym: p for sym, p in prices.items() if p and last_prices.get(sym) != p}
+            if changed:
+                last_prices.update(changed)
+                yield f"data: {app.json.dumps(changed)}\n\n"
+            else:
+                # Comment line keeps proxies from closing the idle connection
+                yield ": keepalive\n\n"
+            time.sleep(STREAM_INTERVAL)
+
+    response = Response(events(), mimetype='text/event-stream',
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    response.call_on_close(release_stream)
+    return response
 
-    img = io.BytesIO()
-    fig.savefig(img, format='png', bbox_inches="tight")
-    img.seek(0)
-    chart_data = base64.b64encode(img.read()).decode('utf-8')
-    plt.close(fig)
-    return jsonify({"chart": chart_data})
+
+@app.route('/get_stock_price_chart/<symbol>')
+def api_get_stock_price_chart(symbol):
+    symbol_up = symbol.upper()
+    if symbol_up == "RANDOM" or not VALID_SYMBOL.fullmatch(symbol_up):
+        return Response(status=204)
+    chart_key = f"chart:{symbol_up}:1y"
+    chart_data = cache_get(chart_key)
+    if chart_data is None:
+        history = get_stock_history(symbol_up)
+        if history is None or len(history[1]) == 0:
+            return Response(status=204)
+        dates, closes = history
+        idx = lttb_indices(closes, CHART_POINTS)
+        chart_data = render_svg_chart(dates[idx], closes[idx], f"{symbol_up} Price History (1 Year)",
+                                      "#3d5a80", positions=idx)
+        cache_set(chart_key, chart_data, CHART_CACHE_TTL)
+    return Response(chart_data, mimetype='image/svg+xml')
 
 
 def compute_local_portfolio_value(local_portfolio):
-    total = local_portfolio["cash"]
-    for sym, data in local_portfolio["stocks"].items():
-        cprice = data.get("currentPrice", data["avg_price"])
-        total += cprice * data["quantity"]
+    holdings = local_portfolio["stocks"].values()
+    prices = np.fromiter((d.get("currentPrice", d["avg_price"]) for d in holdings),
+                         dtype=np.float64, count=len(holdings))
+    quantities = np.fromiter((d["quantity"] for d in holdings),
+                             dtype=np.float64, count=len(holdings))
+    total = local_portfolio["cash"] + float(prices @ quantities)
     return round(total, 2)
 
 
+def with_session_cookie(response, session_id):
+    """
+    Sets the session cookie on response if the browser doesn't have it yet.
+    """
+    if request.cookies.get(SESSION_COOKIE) != session_id:
+        response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="Lax")
+    return response
+
+
 @app.route('/get_portfolio_chart', methods=['POST'])
 def get_portfolio_chart():
     local_portfolio = request.get_json()
     if not local_portfolio:
-        return jsonify({"chart": ""})
+        return Response(status=204)
+    session_id = request.cookies.get(SESSION_COOKIE) or uuid.uuid4().hex
+    history = get_portfolio_history(session_id)
     val = compute_local_portfolio_value(local_portfolio)
-    now = datetime.now()
-    portfolio_history.append((now, val))
-    times = [t.strftime("%H:%M:%S") for t, _ in portfolio_history]
-    values = [v for _, v in portfolio_history]
-
-    fig, ax = plt.subplots(figsize=(8, 4))
-    ax.plot(times, values, color="#2f4858", marker='o', linestyle='-', linewidth=2)
-    ax.set_title("Portfolio Performance")
-    ax.set_xlabel("Time")
-    ax.set_ylabel("Portfolio Value (USD)")
-    ax.grid(True, linestyle="--", alpha=0.5)
-    if len(values) > 1:
-        margin = 0.05 * (max(values) - min(values))
-        ax.set_ylim(min(values) - margin, max(values) + margin)
-    plt.xticks(rotation=45)
-
-    img = io.BytesIO()
-    fig.savefig(img, format='png', bbox_inches="tight")
-    img.seek(0)
-    chart_data = base64.b64encode(img.read()).decode('utf-8')
-    plt.close(fig)
-    return jsonify({"chart": chart_data})
-
-
+    with portfolio_histories_lock:
+        # Only record a point when the value moved, so the plotted data stays put otherwise
+        if not history or history[-1][1] != val:
+            history.append((datetime.now(), val))
+        points = list(history)
+    times = [t.strftime("%H:%M:%S") for t, _ in points]
+    values = [v for _, v in points]
+
+    # Nothing to plot yet; skip matplotlib entirely
+    if len(points) < 2:
+        return with_session_cookie(Response(status=204), session_id)
+
+    # Unchanged history (e.g. a trade at the current price) reuses the last chart
+    chart_key = points[-1][0]
+    last_chart = last_portfolio_charts.get(session_id)
+    if last_chart and last_chart[0] == chart_key:
+        chart_data = last_chart[1]
+    else:
+        fig, ax, img, lock = get_chart_canvas("portfolio")
+        with lock:
+            ax.clear()
+            ax.plot(times, values, color="#2f4858", marker='o', linestyle='-', linewidth=2)
+            ax.set_title("Portfolio Performance")
+            ax.set_xlabel("Time")
+            ax.set_ylabel("Portfolio Value (USD)")
+            ax.grid(True, linestyle="--", alpha=0.5)
+            margin = 0.05 * (max(values) - min(values))
+            ax.set_ylim(min(values) - margin, max(values) + margin)
+            ax.tick_params(axis='x', labelrotation=45)
+
+            img.seek(0)
+            img.truncate(0)
+            # 72 dpi and light zlib compression keep PNG encoding cheap
+            fig.savefig(img, format='png', dpi=72, bbox_inches="tight",
+                        pil_kwargs={"optimize": False, "compress_level": 1})
+            chart_data = img.getvalue()
+        # Only keep the chart while its session exists; eviction is the only cleanup
+        with portfolio_histories_lock:
+            if session_id in portfolio_histories:
+                last_portfolio_charts[session_id] = (chart_key, chart_data)
+    return with_session_cookie(Response(chart_data, mimetype='image/png'), session_id)
+
+
+# Production: gunicorn -w 1 -k gthread --threads 64 tradingsimulator:app
+# Keep a single worker: session histories and chart memos live in process memory.
+# Open /streams hold up to MAX_STREAMS threads; --threads leaves room for other routes.
+# The built-in server below is for local development only.
 if __name__ == '__main__':
     app.run(debug=True)